@@ -1 +1,11 @@
-from .seesaw import *
\ No newline at end of file
+from .seesaw import *
+from .snapshot import *
+from .scheduler import *
+from .capture import *
+from .digitalio import *
+from .discovery import *
+from .registry import *
+from .dac import *
+from .group import *
+from .profile import *
+from .sequence import *
@@ -0,0 +1,306 @@
+# Copyright (c) 2017 Adafruit Industries
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import collections
+import mmap
+import struct
+import time
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+__all__ = ['CaptureWriter', 'CaptureReader', 'CaptureRecord']
+
+CAPTURE_MAGIC = b'SSCP'
+CAPTURE_VERSION = 1
+
+# header: magic, version, record size, record count
+_HEADER = struct.Struct('<4sHHQ')
+_COUNT = struct.Struct('<Q')
+_COUNT_OFFSET = 8
+# record: timestamp, device address, channel, value
+_RECORD = struct.Struct('<dHHI')
+_TIMESTAMP = struct.Struct('<d')
+
+CaptureRecord = collections.namedtuple('CaptureRecord', ['timestamp', 'addr', 'channel', 'value'])
+
+
+class CaptureWriter(object):
+
+	## \brief      Append fixed-width samples to a memory-mapped capture file.
+	#
+	#				Records are packed straight into the mapped file, which grows in chunks as it
+	#				fills. The record count in the header is only updated on flush, so readers of a
+	#				live capture see every record up to the last flush.
+	#
+	#  \param      path the capture file to create. An existing file is overwritten.
+	#	\param		chunk the number of records the file grows by when it is full.
+	#	\param		flush_interval the time in seconds between automatic flushes.
+
+	def __init__(self, path, chunk=65536, flush_interval=1.0):
+		self.path = path
+		self.chunk = chunk
+		self.flush_interval = flush_interval
+		self.count = 0
+
+		self._file = open(path, 'w+b')
+		self._capacity = 0
+		self._map = None
+		self._grow()
+		_HEADER.pack_into(self._map, 0, CAPTURE_MAGIC, CAPTURE_VERSION, _RECORD.size, 0)
+		self._last_flush = time.time()
+
+
+	def _grow(self):
+		if self._map is not None:
+			self._map.flush()
+			self._map.close()
+		self._capacity += self.chunk
+		size = _HEADER.size + self._capacity * _RECORD.size
+		self._file.truncate(size)
+		self._map = mmap.mmap(self._file.fileno(), size)
+
+
+	## \brief     Append one sample.
+	#
+	#  \param      addr the I2C address of the seesaw the sample came from.
+	#	\param		channel the pin or ADC channel that was read.
+	#	\param		value the value that was read.
+	#	\param		timestamp the time of the sample. Defaults to time.time()
+	#
+	#  \return     none
+
+	def append(self, addr, channel, value, timestamp=None):
+
+		now = time.time()
+		if timestamp is None:
+			timestamp = now
+		if self.count == self._capacity:
+			self._grow()
+
+		_RECORD.pack_into(self._map, _HEADER.size + self.count * _RECORD.size, timestamp, addr, channel, value)
+		self.count += 1
+
+		# flushes run on wall clock time, whatever clock the caller stamps records with
+		if now - self._last_flush >= self.flush_interval:
+			self.flush()
+
+
+	## \brief     Read an analog pin and append the result.
+	#
+	#  \param      seesaw the Seesaw to read from.
+	#	\param		pin the pin to read, as passed to Seesaw.analog_read()
+	#
+	#  \return     the value that was read
+
+	def capture_analog(self, seesaw, pin):
+
+		value = seesaw.analog_read(pin)
+		self.append(seesaw.addr, pin, value)
+		return value
+
+
+	## \brief     Read multiple GPIO pins and append the result.
+	#
+	#  \param      seesaw the Seesaw to read from.
+	#	\param		pins a bitmask of the pins to read, as passed to Seesaw.digital_read_bulk()
+	#	\param		channel the channel number to record the sample under.
+	#
+	#  \return     the value that was read
+
+	def capture_gpio(self, seesaw, pins, channel=0xFFFF):
+
+		value = seesaw.digital_read_bulk(pins)
+		self.append(seesaw.addr, channel, value)
+		return value
+
+
+	## \brief     Publish the record count and write the mapped pages back to the file.
+	#
+	#  \return     none
+
+	def flush(self):
+
+		_COUNT.pack_into(self._map, _COUNT_OFFSET, self.count)
+		self._map.flush()
+		self._last_flush = time.time()
+
+
+	## \brief     Flush the capture and trim the file to the records written.
+	#
+	#  \return     none
+
+	def close(self):
+
+		if self._map is None:
+			return
+		self.flush()
+		self._map.close()
+		self._map = None
+		self._file.truncate(_HEADER.size + self.count * _RECORD.size)
+		self._file.close()
+
+
+	def __enter__(self):
+		return self
+
+
+	def __exit__(self, *args):
+		self.close()
+
+
+class CaptureReader(object):
+
+	## \brief      Read a capture file without loading it into memory.
+	#
+	#				If numpy is installed, the columns are zero-copy views of the mapped file. Views
+	#				and memoryviews must be released before CaptureReader.close() or refresh() is called.
+	#
+	#  \param      path the capture file to read.
+
+	def __init__(self, path):
+		self._file = open(path, 'rb')
+		self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+		magic, version, size, count = _HEADER.unpack_from(self._map, 0)
+		if magic != CAPTURE_MAGIC or version != CAPTURE_VERSION or size != _RECORD.size:
+			self.close()
+			raise RuntimeError("%s is not a seesaw capture file." % path)
+		self._array = None
+		self.refresh()
+
+
+	## \brief     Pick up records flushed by a writer since the file was opened.
+	#
+	#  \return     the number of records available
+
+	def refresh(self):
+
+		count = _COUNT.unpack_from(self._map, _COUNT_OFFSET)[0]
+		# a live capture may have grown past our mapping
+		# drop our numpy view first, the map can't be closed while it's exported
+		self._array = None
+		if _HEADER.size + count * _RECORD.size > len(self._map):
+			self._map.close()
+			self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+		self.count = count
+		return count
+
+
+	def __len__(self):
+		return self.count
+
+
+	def __getitem__(self, i):
+		if i < 0:
+			i += self.count
+		if not 0 <= i < self.count:
+			raise IndexError("capture record index out of range")
+		return CaptureRecord(*_RECORD.unpack_from(self._map, _HEADER.size + i * _RECORD.size))
+
+
+	def __iter__(self):
+		for i in range(self.count):
+			yield CaptureRecord(*_RECORD.unpack_from(self._map, _HEADER.size + i * _RECORD.size))
+
+
+	## \brief     The raw records as a memoryview of the mapped file, without copying.
+
+	@property
+	def records(self):
+		return memoryview(self._map)[_HEADER.size:_HEADER.size + self.count * _RECORD.size]
+
+
+	## \brief     The records as a numpy structured array backed by the mapped file.
+	#
+	#  \return     an array with timestamp, addr, channel and value fields
+
+	def array(self):
+
+		if numpy is None:
+			raise RuntimeError("numpy is required for column access to capture files.")
+		if self._array is None:
+			dtype = numpy.dtype([('timestamp', '<f8'), ('addr', '<u2'), ('channel', '<u2'), ('value', '<u4')])
+			self._array = numpy.frombuffer(self._map, dtype=dtype, count=self.count, offset=_HEADER.size)
+		return self._array
+
+
+	## \brief     A single column as a zero-copy numpy array.
+	#
+	#  \param      name one of 'timestamp', 'addr', 'channel' or 'value'
+	#
+	#  \return     the column
+
+	def column(self, name):
+
+		return self.array()[name]
+
+
+	def _timestamp(self, i):
+		return _TIMESTAMP.unpack_from(self._map, _HEADER.size + i * _RECORD.size)[0]
+
+
+	## \brief     Find the first record at or after a time. Records must have been appended in time order.
+	#
+	#  \param      t the time to seek to.
+	#
+	#  \return     the index of the record
+
+	def seek(self, t):
+
+		lo, hi = 0, self.count
+		while lo < hi:
+			mid = (lo + hi) // 2
+			if self._timestamp(mid) < t:
+				lo = mid + 1
+			else:
+				hi = mid
+		return lo
+
+
+	## \brief     The records in a time range.
+	#
+	#  \param      start the start of the range, inclusive.
+	#	\param		end the end of the range, exclusive.
+	#
+	#  \return     a numpy structured array view if numpy is installed, otherwise a list of CaptureRecords
+
+	def between(self, start, end):
+
+		lo, hi = self.seek(start), self.seek(end)
+		if numpy is not None:
+			return self.array()[lo:hi]
+		return [self[i] for i in range(lo, hi)]
+
+
+	def close(self):
+		self._array = None
+		self._map.close()
+		self._file.close()
+
+
+	def __enter__(self):
+		return self
+
+
+	def __exit__(self, *args):
+		self.close()
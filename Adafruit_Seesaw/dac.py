@@ -0,0 +1,140 @@
+# Copyright (c) 2017 Adafruit Industries
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import array
+import collections
+import math
+
+from .seesaw import SEESAW_DAC_BASE, SEESAW_DAC_CHANNEL_OFFSET, _clock, _sleep_until
+
+__all__ = ['DACStream', 'StreamStats', 'sine_table', 'ramp_table']
+
+StreamStats = collections.namedtuple('StreamStats', ['samples', 'elapsed', 'rate', 'underruns', 'max_lateness'])
+
+
+## \brief     Build one period of a sine wave.
+#
+#  \param      length the number of samples in the period.
+#	\param		amplitude the peak deviation from the midpoint.
+#	\param		offset the midpoint of the wave.
+#
+#  \return     an array of unsigned 16 bit samples
+
+def sine_table(length, amplitude=511, offset=512):
+
+	return array.array('H', [int(round(offset + amplitude * math.sin(2 * math.pi * i / length))) for i in range(length)])
+
+
+## \brief     Build one period of a ramp (sawtooth) wave.
+#
+#  \param      length the number of samples in the period.
+#	\param		low the first sample.
+#	\param		high the last sample.
+#
+#  \return     an array of unsigned 16 bit samples
+
+def ramp_table(length, low=0, high=1023):
+
+	if length == 1:
+		return array.array('H', [low])
+	return array.array('H', [int(round(low + (high - low) * float(i) / (length - 1))) for i in range(length)])
+
+
+class DACStream(object):
+
+	## \brief      Play a precomputed sample table out of a seesaw DAC channel.
+	#
+	#				Every sample is turned into its finished I2C transaction up front, so the playback
+	#				loop only has to send buffers. Samples are timed against absolute deadlines, which
+	#				absorbs the bus latency of each write instead of adding it to the period.
+	#
+	#  \param      seesaw the Seesaw to write to.
+	#	\param		table the samples, any sequence of integers such as a list, array or numpy array.
+	#	\param		channel the DAC channel to write.
+
+	def __init__(self, seesaw, table, channel=0):
+		self.seesaw = seesaw
+		self.channel = channel
+		reg = SEESAW_DAC_CHANNEL_OFFSET + channel
+		self._frames = [bytes(bytearray([SEESAW_DAC_BASE, reg, (int(v) >> 8) & 0xFF, int(v) & 0xFF])) for v in table]
+		if not self._frames:
+			raise ValueError("A DAC stream needs at least one sample.")
+
+
+	def __len__(self):
+		return len(self._frames)
+
+
+	## \brief     Play the table.
+	#
+	#  \param      rate the target sample rate in Hz. None sends samples as fast as the bus allows.
+	#	\param		loops the number of times to play the table.
+	#	\param		drop pass False to play every sample even when running late. By default samples
+	#				whose slot has already passed are skipped so the waveform keeps its timing.
+	#
+	#  \return     a StreamStats. underruns counts the samples that missed their slot by more than one
+	#				period, whether they were dropped or sent late.
+
+	def play(self, rate=None, loops=1, drop=True):
+
+		frames = self._frames
+		count = len(frames) * loops
+		bus = self.seesaw._bus
+		bus._select_device(self.seesaw.addr)
+		write = bus._device.write
+
+		sent = 0
+		underruns = 0
+		max_lateness = 0.0
+
+		start = _clock()
+		if rate is None:
+			for _ in range(loops):
+				for frame in frames:
+					write(frame)
+			sent = count
+		else:
+			period = 1.0 / rate
+			i = 0
+			while i < count:
+				deadline = start + i * period
+				now = _clock()
+				if now < deadline:
+					_sleep_until(deadline)
+				else:
+					late = now - deadline
+					max_lateness = max(max_lateness, late)
+					if late > period:
+						if drop:
+							# skip to the sample whose slot we're in, every sample passed over is an underrun
+							skip_to = min(int((now - start) / period), count)
+							underruns += skip_to - i
+							i = skip_to
+							if i >= count:
+								break
+						else:
+							underruns += 1
+				write(frames[i % len(frames)])
+				sent += 1
+				i += 1
+
+		elapsed = _clock() - start
+		achieved = sent / elapsed if elapsed > 0 else 0.0
+		return StreamStats(sent, elapsed, achieved, underruns, max_lateness)
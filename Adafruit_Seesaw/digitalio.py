@@ -0,0 +1,187 @@
+# Copyright (c) 2017 Adafruit Industries
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from .seesaw import _clock
+
+__all__ = ['Port', 'Pin']
+
+
+class Port(object):
+
+	## \brief      Batch per-pin reads and writes into port-wide GPIO transactions.
+	#
+	#				Reads made within the coherency window share a single Seesaw.digital_read_bulk()
+	#				snapshot. Writes go out immediately, unless they are made inside a `with port:`
+	#				block, in which case they are collected and sent together when the block exits.
+	#
+	#  \param      seesaw the Seesaw the pins belong to.
+	#	\param		window the time in seconds a read snapshot stays valid.
+	#	\param		use_shadow passed on to Seesaw.digital_write_port() when writes are flushed.
+
+	__slots__ = ('seesaw', 'window', 'use_shadow', '_snapshot', '_snapshot_time', '_set', '_clear', '_depth')
+
+	def __init__(self, seesaw, window=.005, use_shadow=False):
+		self.seesaw = seesaw
+		self.window = window
+		self.use_shadow = use_shadow
+		self._snapshot = 0
+		self._snapshot_time = None
+		self._set = 0
+		self._clear = 0
+		self._depth = 0
+
+
+	## \brief     Create a Pin on this port.
+	#
+	#  \param      pin the pin number. On the SAMD09 breakout, this corresponds to the number on the silkscreen.
+	#
+	#  \return     the Pin
+
+	def pin(self, pin):
+
+		return Pin(self, pin)
+
+
+	## \brief     Read the status of multiple pins, reusing a recent snapshot if there is one.
+	#				Pins with a write waiting to be flushed read back the value that will be written.
+	#
+	#  \param      pins a bitmask of the pins to read.
+	#
+	#  \return     the status of the passed pins, as returned by Seesaw.digital_read_bulk()
+
+	def read(self, pins):
+
+		now = _clock()
+		if self._snapshot_time is None or now - self._snapshot_time > self.window:
+			self._snapshot = self.seesaw.digital_read_bulk(0xFFFFFFFF)
+			self._snapshot_time = now
+		value = (self._snapshot & ~(self._set | self._clear)) | self._set
+		return value & pins
+
+
+	## \brief     Write a value to multiple pins.
+	#
+	#  \param      pins a bitmask of the pins to write.
+	#	\param		value True to set the pins high, False to set them low.
+	#
+	#  \return     none
+
+	def write(self, pins, value):
+
+		if value:
+			self._set |= pins
+			self._clear &= ~pins
+		else:
+			self._clear |= pins
+			self._set &= ~pins
+		if not self._depth:
+			self.flush()
+
+
+	## \brief     Send any pending writes as a single port update.
+	#
+	#  \return     none
+
+	def flush(self):
+
+		pins = self._set | self._clear
+		if not pins:
+			return
+		self.seesaw.digital_write_port(pins, self._set, self.use_shadow)
+		self._set = 0
+		self._clear = 0
+		# the pins we just drove may now read differently
+		self._snapshot_time = None
+
+
+	## \brief     Drop the read snapshot so the next read goes to the seesaw.
+	#
+	#  \return     none
+
+	def invalidate(self):
+
+		self._snapshot_time = None
+
+
+	def __enter__(self):
+		self._depth += 1
+		return self
+
+
+	def __exit__(self, *args):
+		self._depth -= 1
+		if not self._depth:
+			self.flush()
+
+
+class Pin(object):
+
+	## \brief      A single GPIO pin on a Port.
+	#
+	#  \param      port the Port the pin belongs to.
+	#	\param		pin the pin number. On the SAMD09 breakout, this corresponds to the number on the silkscreen.
+
+	__slots__ = ('port', 'pin', '_mask')
+
+	def __init__(self, port, pin):
+		self.port = port
+		self.pin = pin
+		self._mask = 1 << pin
+
+
+	## \brief     The status of the pin. Setting it writes the output through the port.
+
+	@property
+	def value(self):
+		return self.port.read(self._mask) != 0
+
+	@value.setter
+	def value(self, value):
+		self.port.write(self._mask, value)
+
+
+	## \brief     Make the pin an output. The level is written first, and straight away even inside a
+	#				`with port:` block, so the pin never drives its old level.
+	#
+	#  \param      value the initial value to write.
+	#
+	#  \return     none
+
+	def switch_to_output(self, value=False):
+
+		port = self.port
+		port._set &= ~self._mask
+		port._clear &= ~self._mask
+		port.seesaw.digital_write_port(self._mask, self._mask if value else 0, port.use_shadow)
+		port.seesaw.pin_mode(self.pin, port.seesaw.OUTPUT)
+		port.invalidate()
+
+
+	## \brief     Make the pin an input.
+	#
+	#  \param      pullup pass True to enable the pullup.
+	#
+	#  \return     none
+
+	def switch_to_input(self, pullup=False):
+
+		seesaw = self.port.seesaw
+		seesaw.pin_mode(self.pin, seesaw.INPUT_PULLUP if pullup else seesaw.INPUT)
+		self.port.invalidate()
@@ -0,0 +1,123 @@
+# Copyright (c) 2017 Adafruit Industries
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import collections
+import threading
+import time
+
+from .seesaw import SEESAW_STATUS_BASE, SEESAW_STATUS_HW_ID, SEESAW_STATUS_VERSION, SEESAW_STATUS_OPTIONS
+
+__all__ = ['discover', 'SeesawInfo', 'Inventory']
+
+SeesawInfo = collections.namedtuple('SeesawInfo', ['busnum', 'addr', 'version', 'options'])
+
+
+class Inventory(list):
+
+	## \brief      The seesaws found by discover(), as a list of SeesawInfo.
+	#
+	#				errors maps the bus number of every bus that could not be scanned to the exception
+	#				it raised. Seesaws found on a bus before it failed are still listed.
+
+	def __init__(self, found=(), errors=None):
+		list.__init__(self, found)
+		self.errors = errors if errors is not None else {}
+
+
+def _read(bus, addr, regLow, length, delay):
+	bus._select_device(addr)
+	bus._device.write(bytearray([SEESAW_STATUS_BASE, regLow]))
+	time.sleep(delay)
+	return bytearray(bus._device.read(length))
+
+
+def _to_int(buf):
+	return (buf[0] << 24) | (buf[1] << 16) | (buf[2] << 8) | buf[3]
+
+
+def _probe_bus(i2c, busnum, addresses, delay, found, errors):
+	try:
+		bus = i2c.get_i2c_device(addresses[0], busnum=busnum)._bus
+	except Exception as e:
+		errors[busnum] = e
+		return
+	try:
+		for addr in addresses:
+			# a bare read only checks for an ACK, so nothing is written to devices that aren't seesaws
+			bus._select_device(addr)
+			try:
+				bus._device.read(1)
+			except (IOError, OSError):
+				continue
+
+			try:
+				if _read(bus, addr, SEESAW_STATUS_HW_ID, 1, delay)[0] != 0x55:
+					continue
+				version = _to_int(_read(bus, addr, SEESAW_STATUS_VERSION, 4, delay))
+				options = _to_int(_read(bus, addr, SEESAW_STATUS_OPTIONS, 4, delay))
+			except (IOError, OSError):
+				continue
+			found.append(SeesawInfo(busnum, addr, version, options))
+	except Exception as e:
+		errors[busnum] = e
+	finally:
+		close = getattr(bus, 'close', None)
+		if close is not None:
+			close()
+
+
+## \brief     Find the seesaws on one or more I2C buses without resetting them.
+#
+#				Each bus is scanned on its own thread. An address is only sent the hardware ID register
+#				read if it first acknowledges a plain read, but any other device that answers will still
+#				see that register write, so narrow the addresses on buses shared with other parts.
+#
+#  \param      busnums the I2C bus numbers to scan. None scans the default bus.
+#	\param		addresses the 7 bit addresses to probe.
+#	\param		i2c the I2C module to use. Defaults to Adafruit_GPIO.I2C
+#	\param		delay the delay (seconds) between setting a register and reading it back.
+#
+#  \return     an Inventory of SeesawInfo sorted by bus and address, with the errors of any bus that
+#				failed. If every bus failed, the first error is raised instead.
+
+def discover(busnums=(None,), addresses=range(0x08, 0x78), i2c=None, delay=.001):
+
+	if i2c is None:
+		import Adafruit_GPIO.I2C as I2C
+		i2c = I2C
+	addresses = list(addresses)
+	# scanning a bus twice would only list its seesaws twice
+	busnums = list(collections.OrderedDict.fromkeys(busnums))
+
+	found = []
+	errors = {}
+	threads = []
+	for busnum in busnums:
+		t = threading.Thread(target=_probe_bus, args=(i2c, busnum, addresses, delay, found, errors))
+		t.daemon = True
+		threads.append(t)
+		t.start()
+	for t in threads:
+		t.join()
+	if errors and len(errors) == len(threads):
+		raise errors[busnums[0]]
+
+	found.sort(key=lambda info: (info.busnum is not None, info.busnum, info.addr))
+	return Inventory(found, errors)
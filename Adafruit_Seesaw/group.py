@@ -0,0 +1,144 @@
+# Copyright (c) 2017 Adafruit Industries
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import collections
+import threading
+
+from .seesaw import _clock
+
+__all__ = ['SeesawGroup', 'GroupResult']
+
+
+class GroupResult(object):
+
+	## \brief      The outcome of a command sent to a SeesawGroup.
+	#
+	#				results and errors are keyed by (busnum, addr). skew is the time in seconds between
+	#				the first and the last device finishing the command.
+
+	def __init__(self, results, errors, skew):
+		self.results = results
+		self.errors = errors
+		self.skew = skew
+
+
+	## \brief     True if every device ran the command without raising.
+
+	@property
+	def ok(self):
+		return not self.errors
+
+
+	## \brief     Raise the first error if any device failed.
+	#
+	#  \return     the results
+
+	def check(self):
+
+		for key, e in self.errors.items():
+			raise RuntimeError("Seesaw at %#04x on bus %s failed: %s" % (key[1], key[0], e))
+		return self.results
+
+
+class SeesawGroup(object):
+
+	## \brief      Send the same command to many seesaws at once.
+	#
+	#				Any Seesaw method can be called on the group, ex. group.digital_write_bulk(mask, True),
+	#				and returns a GroupResult. Devices on the same bus get the command in the order they
+	#				were added; each bus runs on its own thread, and all buses are released together so
+	#				the boards update as close to simultaneously as the buses allow.
+	#
+	#  \param      devices the Seesaws in the group.
+
+	def __init__(self, devices=()):
+		self._buses = collections.OrderedDict()
+		for device in devices:
+			self.add(device)
+
+
+	## \brief     Add a seesaw to the group.
+	#
+	#  \param      device the Seesaw to add.
+	#
+	#  \return     none
+
+	def add(self, device):
+
+		self._buses.setdefault(device.busnum, []).append(device)
+
+
+	## \brief     The seesaws in the group, grouped by bus.
+
+	@property
+	def devices(self):
+		return [device for devices in self._buses.values() for device in devices]
+
+
+	def __len__(self):
+		return sum(len(devices) for devices in self._buses.values())
+
+
+	def __getattr__(self, name):
+		if name.startswith('_'):
+			raise AttributeError(name)
+		return lambda *args, **kwargs: self.call(name, *args, **kwargs)
+
+
+	## \brief     Call a Seesaw method on every device in the group.
+	#
+	#  \param      name the name of the method, ex. 'pin_mode_bulk'
+	#	\param		args the arguments to pass to the method.
+	#
+	#  \return     a GroupResult
+
+	def call(self, name, *args, **kwargs):
+
+		results = {}
+		errors = {}
+		finished = []
+
+		# resolve everything before the start so the buses only have bus work left to do
+		work = [[(getattr(device, name), (device.busnum, device.addr)) for device in devices] for devices in self._buses.values()]
+
+		def run(calls, go):
+			if go is not None:
+				go.wait()
+			for method, key in calls:
+				try:
+					results[key] = method(*args, **kwargs)
+				except Exception as e:
+					errors[key] = e
+				finished.append(_clock())
+
+		if len(work) == 1:
+			run(work[0], None)
+		else:
+			go = threading.Event()
+			threads = [threading.Thread(target=run, args=(calls, go)) for calls in work]
+			for t in threads:
+				t.daemon = True
+				t.start()
+			go.set()
+			for t in threads:
+				t.join()
+
+		skew = max(finished) - min(finished) if finished else 0.0
+		return GroupResult(results, errors, skew)
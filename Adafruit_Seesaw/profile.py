@@ -0,0 +1,158 @@
+# Copyright (c) 2017 Adafruit Industries
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import collections
+
+from .seesaw import Seesaw, SEESAW_GPIO_BASE, SEESAW_TIMER_BASE, SEESAW_DAC_BASE, SEESAW_SERCOM0_BASE, \
+	SEESAW_GPIO_DIRSET_BULK, SEESAW_GPIO_DIRCLR_BULK, SEESAW_GPIO_BULK_SET, SEESAW_GPIO_BULK_CLR, \
+	SEESAW_GPIO_INTENSET, SEESAW_GPIO_INTENCLR, SEESAW_GPIO_PULLENSET, SEESAW_GPIO_PULLENCLR, \
+	SEESAW_TIMER_PWM, SEESAW_DAC_CHANNEL_OFFSET, SEESAW_SERCOM_BAUD, PWM_0_PIN, PWM_1_PIN, PWM_2_PIN, PWM_3_PIN
+
+__all__ = ['compile_profile', 'apply_profile', 'Transaction']
+
+Transaction = collections.namedtuple('Transaction', ['regHigh', 'regLow', 'buf'])
+
+_PWM_CHANNELS = {PWM_0_PIN: 0, PWM_1_PIN: 1, PWM_2_PIN: 2, PWM_3_PIN: 3}
+
+
+def _mask(pins):
+	mask = 0
+	for pin in pins:
+		mask |= 1 << pin
+	return mask
+
+
+def _gpio(regLow, pins):
+	return Transaction(SEESAW_GPIO_BASE, regLow, bytearray([(pins >> 24) & 0xFF, (pins >> 16) & 0xFF, (pins >> 8) & 0xFF, pins & 0xFF]))
+
+
+## \brief     Compile a board profile into the shortest ordered list of register writes.
+#
+#				A profile is a dict describing the whole state the board should end up in:
+#
+#				  'pins'        {pin: Seesaw.INPUT, Seesaw.OUTPUT or Seesaw.INPUT_PULLUP}
+#				  'outputs'     {pin: True or False} for pins set to Seesaw.OUTPUT
+#				  'interrupts'  the pins that should have GPIO interrupts enabled
+#				  'pwm'         {pin: value between 0 and 255}
+#				  'dac'         {channel: value}
+#				  'uart_baud'   the SERCOM0 baud rate
+#
+#				Pins are grouped by mode so each register is written at most once. Inputs are
+#				released before their pullups are set, and output levels are written before the
+#				pins are made outputs, so pins never glitch.
+#
+#  \param      profile the profile dict.
+#	\param		from_reset pass True if the seesaw was just reset. Writes that would only restore
+#				reset defaults (inputs, no pullups, low outputs, no interrupts, PWM off) are dropped.
+#
+#  \return     a list of Transactions
+
+def compile_profile(profile, from_reset=False):
+
+	pins = profile.get('pins', {})
+	outputs = profile.get('outputs', {})
+
+	modes = {Seesaw.INPUT: [], Seesaw.OUTPUT: [], Seesaw.INPUT_PULLUP: []}
+	for pin, mode in pins.items():
+		if mode not in modes:
+			raise ValueError("Pin %d has an unknown mode %r." % (pin, mode))
+		modes[mode].append(pin)
+	for pin in outputs:
+		if pins.get(pin) != Seesaw.OUTPUT:
+			raise ValueError("Pin %d has an output value but is not an output." % pin)
+
+	inputs = _mask(modes[Seesaw.INPUT])
+	pullups = _mask(modes[Seesaw.INPUT_PULLUP])
+	high = _mask(pin for pin, value in outputs.items() if value)
+	low = _mask(pin for pin, value in outputs.items() if not value)
+	# outputs that weren't given a level are driven low, as they are after a reset
+	low |= _mask(modes[Seesaw.OUTPUT]) & ~high & ~low
+
+	out = []
+	# inputs stop driving before their pullups are set up, or a low output would be driven high
+	if (inputs | pullups) and not from_reset:
+		out.append(_gpio(SEESAW_GPIO_DIRCLR_BULK, inputs | pullups))
+	if pullups:
+		out.append(_gpio(SEESAW_GPIO_PULLENSET, pullups))
+	if inputs and not from_reset:
+		out.append(_gpio(SEESAW_GPIO_PULLENCLR, inputs))
+	# pullups pull up through the output register, so they share the set with the high outputs
+	if high | pullups:
+		out.append(_gpio(SEESAW_GPIO_BULK_SET, high | pullups))
+	if low and not from_reset:
+		out.append(_gpio(SEESAW_GPIO_BULK_CLR, low))
+	if modes[Seesaw.OUTPUT]:
+		out.append(_gpio(SEESAW_GPIO_DIRSET_BULK, _mask(modes[Seesaw.OUTPUT])))
+
+	if 'interrupts' in profile:
+		enabled = _mask(profile['interrupts'])
+		if enabled:
+			out.append(_gpio(SEESAW_GPIO_INTENSET, enabled))
+		if not from_reset and ~enabled & 0xFFFFFFFF:
+			out.append(_gpio(SEESAW_GPIO_INTENCLR, ~enabled & 0xFFFFFFFF))
+
+	for pin, value in sorted(profile.get('pwm', {}).items()):
+		if pin not in _PWM_CHANNELS:
+			raise ValueError("Pin %d is not PWM enabled." % pin)
+		if value or not from_reset:
+			out.append(Transaction(SEESAW_TIMER_BASE, SEESAW_TIMER_PWM, bytearray([_PWM_CHANNELS[pin], value])))
+
+	for channel, value in sorted(profile.get('dac', {}).items()):
+		out.append(Transaction(SEESAW_DAC_BASE, SEESAW_DAC_CHANNEL_OFFSET + channel, bytearray([(value >> 8) & 0xFF, value & 0xFF])))
+
+	if 'uart_baud' in profile:
+		baud = profile['uart_baud']
+		out.append(Transaction(SEESAW_SERCOM0_BASE, SEESAW_SERCOM_BAUD, bytearray([(baud >> 24) & 0xFF, (baud >> 16) & 0xFF, (baud >> 8) & 0xFF, baud & 0xFF])))
+
+	return out
+
+
+## \brief     Bring a seesaw to the state described by a profile.
+#
+#  \param      seesaw the Seesaw to configure.
+#	\param		profile the profile dict, see compile_profile()
+#	\param		from_reset pass True if the seesaw was just reset, see compile_profile()
+#	\param		verify pass True to read the outputs back afterwards and raise a RuntimeError if any
+#				of them is not at the level the profile asks for.
+#
+#  \return     the list of Transactions that were sent
+
+def apply_profile(seesaw, profile, from_reset=False, verify=False):
+
+	transactions = compile_profile(profile, from_reset)
+	for t in transactions:
+		seesaw.write_raw(bytearray([t.regHigh, t.regLow]) + t.buf)
+
+	pins = profile.get('pins', {})
+	outputs = profile.get('outputs', {})
+	pullups = _mask(pin for pin, mode in pins.items() if mode == Seesaw.INPUT_PULLUP)
+	high = _mask(pin for pin, value in outputs.items() if value) | pullups
+	low = _mask(pin for pin, mode in pins.items() if mode == Seesaw.OUTPUT) & ~high
+	seesaw._shadow_set(high)
+	seesaw._shadow_clear(low)
+
+	if verify:
+		# pullup inputs are left out, the board may be holding them low
+		checked = low | (high & ~pullups)
+		wrong = (seesaw.digital_read_bulk(checked) ^ high) & checked
+		if wrong:
+			raise RuntimeError("Seesaw at %#04x did not apply its profile, pins %#010x read back wrong." % (seesaw.addr, wrong))
+
+	return transactions
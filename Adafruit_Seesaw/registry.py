@@ -0,0 +1,215 @@
+# Copyright (c) 2017 Adafruit Industries
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import atexit
+import threading
+import time
+import weakref
+
+from .seesaw import Seesaw, _resolve_busnum
+
+__all__ = ['SeesawRegistry', 'default_registry']
+
+
+class _Entry(object):
+
+	__slots__ = ('seesaw', 'refs', 'idle_since', 'owners')
+
+	def __init__(self, seesaw):
+		self.seesaw = seesaw
+		# references taken without an owner, the owned ones are the weakrefs in owners
+		self.refs = 0
+		self.idle_since = None
+		self.owners = []
+
+
+	def held(self):
+		return self.refs + len(self.owners)
+
+
+class SeesawRegistry(object):
+
+	## \brief      Share one initialized Seesaw per physical device.
+	#
+	#				The first get() for a bus and address constructs the Seesaw, which resets the
+	#				device once. Later calls return the same instance and add a reference. Instances
+	#				with no references left are closed once they have been idle for idle_timeout
+	#				seconds; idle instances are swept whenever the registry is used, or by calling sweep().
+	#
+	#  \param      idle_timeout the time in seconds an unreferenced Seesaw is kept open.
+
+	def __init__(self, idle_timeout=30.0):
+		self.idle_timeout = idle_timeout
+		self._entries = {}
+		# events for the devices being opened, set once the Seesaw exists or failed to open
+		self._opening = {}
+		# weakref callbacks can run on any thread, including one already holding the lock
+		self._lock = threading.RLock()
+
+
+	## \brief     Get the shared Seesaw for a device, creating it if needed.
+	#
+	#  \param      busnum the I2C bus number, or None for the default bus.
+	#	\param		addr the I2C address of the seesaw.
+	#	\param		owner an optional object holding the reference. The reference is released
+	#				automatically when the owner is garbage collected.
+	#	\param		kwargs passed on to the Seesaw constructor the first time the device is opened.
+	#
+	#  \return     the Seesaw
+
+	def get(self, busnum=None, addr=0x49, owner=None, **kwargs):
+
+		i2c = kwargs.get('i2c')
+		if i2c is None:
+			import Adafruit_GPIO.I2C as I2C
+			i2c = I2C
+		busnum = _resolve_busnum(i2c, busnum)
+		key = (busnum, addr)
+
+		while True:
+			with self._lock:
+				self.sweep()
+				entry = self._entries.get(key)
+				if entry is not None:
+					return self._hold(entry, owner)
+				opening = self._opening.get(key)
+				if opening is None:
+					opening = self._opening[key] = threading.Event()
+					break
+			# another thread is resetting this device, wait and use its instance
+			opening.wait()
+
+		# opening resets the device and sleeps, so it is done without holding the lock
+		try:
+			if busnum is not None:
+				kwargs['busnum'] = busnum
+			seesaw = Seesaw(addr, **kwargs)
+			with self._lock:
+				entry = self._entries[key] = _Entry(seesaw)
+				return self._hold(entry, owner)
+		finally:
+			with self._lock:
+				del self._opening[key]
+			opening.set()
+
+
+	def _hold(self, entry, owner):
+		entry.idle_since = None
+		if owner is None:
+			entry.refs += 1
+		else:
+			seesaw = entry.seesaw
+			entry.owners.append(weakref.ref(owner, lambda ref: self._owner_collected(seesaw, ref)))
+		return entry.seesaw
+
+
+	## \brief     Give back a reference taken with get(). Each reference is only ever released once:
+	#				releasing an owned reference stops its owner's garbage collection from releasing it again.
+	#
+	#  \param      seesaw the Seesaw returned by get()
+	#	\param		owner the owner passed to get(), if any. Without it an owned reference is released
+	#				before a plain one, so a mismatched release can keep the seesaw open but never closes
+	#				it under another holder.
+	#
+	#  \return     none
+
+	def release(self, seesaw, owner=None):
+
+		with self._lock:
+			entry = self._entry(seesaw)
+			if entry is None or not entry.held():
+				raise ValueError("Seesaw at %#04x is not held in this registry." % seesaw.addr)
+
+			if owner is not None:
+				refs = [ref for ref in entry.owners if ref() is owner]
+				if not refs:
+					raise ValueError("Seesaw at %#04x is not held by %r." % (seesaw.addr, owner))
+				self._drop_owner(entry, refs[0])
+			elif entry.owners:
+				# prefer references whose owner is already gone, their callback may still be pending
+				dead = [ref for ref in entry.owners if ref() is None]
+				self._drop_owner(entry, dead[0] if dead else entry.owners[-1])
+			else:
+				entry.refs -= 1
+
+			if not entry.held():
+				entry.idle_since = time.time()
+			self.sweep()
+
+
+	def _entry(self, seesaw):
+		entry = self._entries.get((seesaw.busnum, seesaw.addr))
+		if entry is None or entry.seesaw is not seesaw:
+			return None
+		return entry
+
+
+	def _drop_owner(self, entry, ref):
+		for i, other in enumerate(entry.owners):
+			if other is ref:
+				del entry.owners[i]
+				return
+
+
+	def _owner_collected(self, seesaw, ref):
+		# runs inside a weakref callback, so it must never raise
+		with self._lock:
+			entry = self._entry(seesaw)
+			if entry is None or not any(other is ref for other in entry.owners):
+				return
+			self._drop_owner(entry, ref)
+			if not entry.held():
+				entry.idle_since = time.time()
+			self.sweep()
+
+
+	## \brief     Close the instances that have been idle for longer than idle_timeout.
+	#
+	#  \return     none
+
+	def sweep(self):
+
+		now = time.time()
+		with self._lock:
+			for key, entry in list(self._entries.items()):
+				if entry.idle_since is not None and now - entry.idle_since >= self.idle_timeout:
+					del self._entries[key]
+					entry.seesaw.close()
+
+
+	## \brief     Close every instance, whether or not it is still referenced.
+	#
+	#  \return     none
+
+	def close_all(self):
+
+		with self._lock:
+			entries = list(self._entries.values())
+			self._entries.clear()
+		for entry in entries:
+			entry.seesaw.close()
+
+
+	def __len__(self):
+		return len(self._entries)
+
+
+default_registry = SeesawRegistry()
+atexit.register(default_registry.close_all)
@@ -0,0 +1,299 @@
+# Copyright (c) 2017 Adafruit Industries
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import collections
+import logging
+import math
+import threading
+
+from .seesaw import _clock, _sleep_until
+
+__all__ = ['SamplingScheduler', 'SampleJob', 'JobStats']
+
+logger = logging.getLogger(__name__)
+
+JobStats = collections.namedtuple('JobStats', ['name', 'runs', 'missed', 'utilization', 'jitter_mean', 'jitter_max', 'jitter_std'])
+
+
+class SampleJob(object):
+
+	## \brief      A periodic register read. Jobs are created by SamplingScheduler.add_job()
+
+	def __init__(self, name, device, regHigh, regLow, length, period, deadline, delay, cost, callback):
+		self.name = name
+		self.device = device
+		self.regHigh = regHigh
+		self.regLow = regLow
+		self.length = length
+		self.period = period
+		self.deadline = deadline
+		self.delay = delay
+		self.cost = cost
+		self.callback = callback
+
+		self.value = None
+		self.timestamp = None
+		self.reset_stats()
+
+
+	def reset_stats(self):
+		self.runs = 0
+		self.missed = 0
+		self.busy = 0.0
+		self._jitter_sum = 0.0
+		self._jitter_sq = 0.0
+		self._jitter_max = 0.0
+
+
+	def _record(self, jitter, busy, missed):
+		self.runs += 1
+		self.busy += busy
+		if missed:
+			self.missed += 1
+		self._jitter_sum += jitter
+		self._jitter_sq += jitter * jitter
+		self._jitter_max = max(self._jitter_max, jitter)
+
+
+	## \brief     Timing statistics for this job.
+	#
+	#  \param      elapsed the time in seconds the schedule ran for.
+	#
+	#  \return     a JobStats. Jitter is the delay between a sample's release and its read starting.
+
+	def stats(self, elapsed):
+
+		if self.runs:
+			mean = self._jitter_sum / self.runs
+			std = math.sqrt(max(self._jitter_sq / self.runs - mean * mean, 0.0))
+		else:
+			mean = std = 0.0
+		utilization = self.busy / elapsed if elapsed > 0 else 0.0
+		return JobStats(self.name, self.runs, self.missed, utilization, mean, self._jitter_max, std)
+
+
+class SamplingScheduler(object):
+
+	## \brief      Run periodic register reads across one or more seesaws.
+	#
+	#				Jobs are grouped by I2C bus. Each bus gets its own thread, which runs the
+	#				released jobs in earliest-deadline-first order. A job is rejected when it is
+	#				added if its bus could no longer meet every deadline.
+	#
+	#  \param      bus_speed the I2C clock in Hz, used to estimate how long each read holds the bus.
+	#	\param		overhead a fixed per-read cost in seconds for the host side of the transfer.
+
+	def __init__(self, bus_speed=100000, overhead=.0002):
+		self.bus_speed = bus_speed
+		self.overhead = overhead
+		self._buses = collections.OrderedDict()
+		self._threads = []
+		self._running = False
+		self._elapsed = 0.0
+		self._busy = {}
+
+
+	## \brief     Estimate how long a register read holds the bus.
+	#
+	#				Seesaw.read() writes the two register bytes, sleeps for the read delay and then
+	#				reads the data back, so the bus is tied up for the whole delay.
+	#
+	#  \param      length the number of bytes read.
+	#	\param		delay the delay passed to Seesaw.read()
+	#
+	#  \return     the estimated time in seconds
+
+	def read_cost(self, length, delay=.001):
+
+		# address byte + 2 register bytes, then address byte + data, 9 clocks per byte
+		clocks = (3 + 1 + length) * 9
+		return delay + float(clocks) / self.bus_speed + self.overhead
+
+
+	## \brief     Declare a periodic read.
+	#
+	#  \param      device the Seesaw to read from.
+	#	\param		regHigh the module address register (ex. SEESAW_ADC_BASE)
+	#	\param		regLow the function address register (ex. SEESAW_ADC_CHANNEL_OFFSET + 2)
+	#	\param		length the number of bytes to read.
+	#	\param		period the time in seconds between samples.
+	#	\param		deadline the time in seconds after each release by which the read must finish.
+	#				Defaults to the period.
+	#	\param		callback an optional function called as callback(job, buf, timestamp) after each read.
+	#	\param		name an optional name for the job used in reports.
+	#	\param		delay the delay passed to Seesaw.read()
+	#
+	#  \return     the SampleJob
+
+	def add_job(self, device, regHigh, regLow, length, period, deadline=None, callback=None, name=None, delay=.001):
+
+		if self._running:
+			raise RuntimeError("Jobs can not be added while the scheduler is running.")
+		if deadline is None:
+			deadline = period
+		if name is None:
+			name = '%#04x:%#04x.%#04x' % (device.addr, regHigh, regLow)
+
+		cost = self.read_cost(length, delay)
+		job = SampleJob(name, device, regHigh, regLow, length, period, deadline, delay, cost, callback)
+
+		if cost > deadline:
+			raise ValueError("Job %s needs %.6fs of bus time but its deadline is %.6fs." % (name, cost, deadline))
+
+		jobs = self._buses.get(device.busnum, [])
+		load = self._load(jobs + [job])
+		if load > 1.0:
+			raise ValueError("Job %s makes bus %s infeasible (load %.3f)." % (name, device.busnum, load))
+
+		self._buses[device.busnum] = jobs + [job]
+		return job
+
+
+	def _load(self, jobs):
+		# reads can't be preempted, so on top of the EDF density test each job may be
+		# blocked by one read of any job with a later deadline that has already started
+		density = sum(job.cost / min(job.period, job.deadline) for job in jobs)
+		worst = density
+		for job in jobs:
+			blocking = [other.cost for other in jobs if other.deadline > job.deadline]
+			if blocking:
+				worst = max(worst, density + max(blocking) / job.deadline)
+		return worst
+
+
+	## \brief     The estimated fraction of each bus the declared jobs will use.
+	#
+	#  \return     a dict mapping bus numbers to utilization between 0 and 1.
+
+	def planned_utilization(self):
+
+		return dict((bus, sum(job.cost / job.period for job in jobs)) for bus, jobs in self._buses.items())
+
+
+	## \brief     Run the schedule.
+	#
+	#  \param      duration the time in seconds to run for. If None, run until SamplingScheduler.stop()
+	#				is called from another thread.
+	#
+	#  \return     none
+
+	def run(self, duration=None):
+
+		self._running = True
+		self._busy = {}
+		for jobs in self._buses.values():
+			for job in jobs:
+				job.reset_stats()
+
+		start = _clock() + .001
+		end = None if duration is None else start + duration
+		self._threads = []
+		for bus, jobs in self._buses.items():
+			t = threading.Thread(target=self._run_bus, args=(bus, jobs, start, end))
+			t.daemon = True
+			self._threads.append(t)
+			t.start()
+
+		try:
+			for t in self._threads:
+				while t.is_alive():
+					t.join(.1)
+		finally:
+			self._running = False
+			stopped = _clock() if end is None else min(_clock(), end)
+			self._elapsed = max(stopped - start, 0.0)
+
+
+	## \brief     Stop a running schedule.
+	#
+	#  \return     none
+
+	def stop(self):
+
+		self._running = False
+
+
+	def _run_bus(self, bus, jobs, start, end):
+		releases = [start] * len(jobs)
+		busy = 0.0
+
+		while self._running:
+			now = _clock()
+			if end is not None and now >= end:
+				break
+
+			# pick the released job with the earliest absolute deadline
+			best = None
+			for i, job in enumerate(jobs):
+				if releases[i] <= now and (best is None or releases[i] + job.deadline < releases[best] + jobs[best].deadline):
+					best = i
+
+			if best is None:
+				wake = min(releases)
+				if end is not None:
+					wake = min(wake, end)
+				_sleep_until(wake)
+				continue
+
+			job = jobs[best]
+			release = releases[best]
+			began = _clock()
+			try:
+				buf = job.device.read(job.regHigh, job.regLow, job.length, job.delay)
+			except (IOError, OSError) as e:
+				logger.warning("Sample job %s failed: %s", job.name, e)
+				buf = None
+			finished = _clock()
+
+			busy += finished - began
+			job._record(began - release, finished - began, finished > release + job.deadline)
+			if buf is not None:
+				job.value = buf
+				job.timestamp = finished
+				if job.callback is not None:
+					job.callback(job, buf, finished)
+
+			# releases we fell too far behind to serve count as misses
+			releases[best] += job.period
+			while releases[best] + job.deadline < finished:
+				releases[best] += job.period
+				job.missed += 1
+
+		self._busy[bus] = busy
+
+
+	## \brief     Timing statistics from the last run.
+	#
+	#  \return     a list of JobStats, one for each job.
+
+	def report(self):
+
+		return [job.stats(self._elapsed) for jobs in self._buses.values() for job in jobs]
+
+
+	## \brief     The measured fraction of time each bus was busy during the last run.
+	#
+	#  \return     a dict mapping bus numbers to utilization between 0 and 1.
+
+	def bus_utilization(self):
+
+		if self._elapsed <= 0:
+			return dict((bus, 0.0) for bus in self._buses)
+		return dict((bus, self._busy.get(bus, 0.0) / self._elapsed) for bus in self._buses)
@@ -23,6 +23,25 @@ import logging
 from Adafruit_bitfield import Adafruit_bitfield
 import time
 
+# monotonic high resolution clock for the timing loops, falls back to time.time on python 2
+_clock = getattr(time, 'perf_counter', time.time)
+
+
+def _sleep_until(deadline, spin=.002):
+	# sleep most of the way to the deadline, then spin for the last few ms so we wake on time
+	remaining = deadline - _clock()
+	if remaining > spin:
+		time.sleep(remaining - spin)
+	while _clock() < deadline:
+		pass
+
+
+def _resolve_busnum(i2c, busnum):
+	# None means the default bus, name it so the same bus always compares equal
+	if busnum is None and hasattr(i2c, 'get_default_bus'):
+		return i2c.get_default_bus()
+	return busnum
+
 SEESAW_STATUS_BASE = 0x00
 SEESAW_GPIO_BASE = 0x01
 SEESAW_SERCOM0_BASE = 0x02
@@ -62,6 +81,9 @@ SEESAW_ADC_WINMODE = 0x04
 SEESAW_ADC_WINTHRESH = 0x05
 SEESAW_ADC_CHANNEL_OFFSET = 0x07
 
+SEESAW_DAC_STATUS = 0x00
+SEESAW_DAC_CHANNEL_OFFSET = 0x07
+
 SEESAW_SERCOM_STATUS = 0x00
 SEESAW_SERCOM_INTEN = 0x02
 SEESAW_SERCOM_INTENCLR = 0x03
@@ -98,12 +120,57 @@ class Seesaw(object):
 			i2c = I2C
 		self._bus = i2c.get_i2c_device(addr, **kwargs)._bus
 		self.addr = addr
+		self.busnum = _resolve_busnum(i2c, kwargs.get('busnum'))
 
 		self._sercom_status = Adafruit_bitfield([('ERROR', 1), ('DATA_RDY', 1)])
 		self._sercom_inten = Adafruit_bitfield([('ERROR', 1), ('DATA_RDY', 1)])
+		# shadow of the GPIO output register, None when we don't know what it holds
+		self._gpio_out = None
 		self.begin()
 
 
+	## \brief      Get a shared, already started seesaw from the default registry.
+	#
+	#				Every caller asking for the same bus and address gets the same instance, so the
+	#				device is only opened and reset once. Call release() when you are done with it.
+	# 
+	#  \param      busnum the I2C bus number, or None for the default bus.
+	#	\param		addr the I2C address of the seesaw.
+	#	\param		owner an optional object holding the reference. The reference is released
+	#				automatically when the owner is garbage collected.
+	#
+	#  \return     the shared Seesaw
+
+	@classmethod
+	def get(cls, busnum=None, addr=0x49, owner=None, **kwargs):
+
+		from .registry import default_registry
+		return default_registry.get(busnum, addr, owner=owner, **kwargs)
+
+
+	## \brief      Give back a seesaw returned by Seesaw.get()
+	#
+	#  \param      owner the owner passed to Seesaw.get(), if any.
+	#
+	#  \return     none
+
+	def release(self, owner=None):
+
+		from .registry import default_registry
+		default_registry.release(self, owner)
+
+
+	## \brief      Close the I2C bus handle used by the seesaw.
+	#
+	#  \return     none
+
+	def close(self):
+
+		close = getattr(self._bus, 'close', None)
+		if close is not None:
+			close()
+
+
 	## \brief      Start the seesaw
 	#
 	#				This should be called when your sketch is connecting to the seesaw
@@ -133,6 +200,7 @@ class Seesaw(object):
 	def sw_reset(self):
 
 		self.write8(SEESAW_STATUS_BASE, SEESAW_STATUS_SWRST, 0xFF)
+		self._gpio_out = 0
 
 
 	## \brief     Returns the available options compiled into the seesaw firmware.
@@ -277,7 +345,7 @@ class Seesaw(object):
 			self.write(SEESAW_GPIO_BASE, SEESAW_GPIO_DIRCLR_BULK, cmd)
 			self.write(SEESAW_GPIO_BASE, SEESAW_GPIO_PULLENSET, cmd)
 			self.write(SEESAW_GPIO_BASE, SEESAW_GPIO_BULK_SET, cmd)
-			
+			self._shadow_set(pins)
 
 
 	## \brief     write a value to multiple GPIO pins at once.
@@ -293,8 +361,89 @@ class Seesaw(object):
 		cmd =  bytearray([(pins >> 24) & 0xFF, (pins >> 16) & 0xFF, (pins >> 8) & 0xFF, pins & 0xFF])
 		if value:
 			self.write(SEESAW_GPIO_BASE, SEESAW_GPIO_BULK_SET, cmd)
+			self._shadow_set(pins)
 		else:
 			self.write(SEESAW_GPIO_BASE, SEESAW_GPIO_BULK_CLR, cmd)
+			self._shadow_clear(pins)
+
+
+	## \brief     toggle the output of multiple GPIO pins at once.
+	# 
+	#  \param      pins a bitmask of the pins to toggle. On the SAMD09 breakout, this corresponds to the number on the silkscreen.
+	#				For example, passing 0b0110 will invert the outputs of pins 2 and 3.
+	#
+	#  \return     none
+
+	def digital_toggle_bulk(self, pins):
+
+		cmd =  bytearray([(pins >> 24) & 0xFF, (pins >> 16) & 0xFF, (pins >> 8) & 0xFF, pins & 0xFF])
+		self.write(SEESAW_GPIO_BASE, SEESAW_GPIO_BULK_TOGGLE, cmd)
+		if self._gpio_out is not None:
+			self._gpio_out ^= pins
+
+
+	## \brief     Re-read the GPIO outputs into the shadow used by digital_write_port(use_shadow=True)
+	#
+	#				The shadow is kept up to date by this object's own GPIO writes only. Call this after
+	#				anything else may have changed the outputs: raw write() calls, another Seesaw object
+	#				or another process talking to the same board. The pin levels are read back, which
+	#				matches the output register for every pin configured as an output.
+	#
+	#  \return     the outputs that were read
+
+	def resync_outputs(self):
+
+		buf = self.read(SEESAW_GPIO_BASE, SEESAW_GPIO_BULK, 4)
+		self._gpio_out = (buf[0] << 24) | (buf[1] << 16) | (buf[2] << 8) | buf[3]
+		return self._gpio_out
+
+
+	## \brief     write an arbitrary pattern to multiple GPIO pins using as few transactions as possible.
+	#
+	#				Pins that all go the same way are written with a single set or clear, otherwise a
+	#				mixed pattern needs a set followed by a clear. With use_shadow, only the pins that
+	#				differ from the tracked outputs are written and a mixed pattern becomes a single
+	#				toggle, so every pin changes in the same transaction.
+	# 
+	#  \param      pins a bitmask of the pins to write. On the SAMD09 breakout, this corresponds to the number on the silkscreen.
+	#	\param		values a bitmask of the values to write. Bits of values outside of pins are ignored.
+	#				For example, passing pins=0b0110 and values=0b0010 sets pin 2 high and pin 3 low.
+	#	\param		use_shadow pass True to trust the tracked outputs. They are exact from the last reset
+	#				on as long as every GPIO write goes through this object; otherwise call resync_outputs()
+	#				first, or a toggle will invert the wrong pins.
+	#
+	#  \return     the number of transactions sent
+
+	def digital_write_port(self, pins, values, use_shadow=False):
+
+		set_pins = pins & values & 0xFFFFFFFF
+		clear_pins = pins & ~values & 0xFFFFFFFF
+
+		if use_shadow and self._gpio_out is not None:
+			set_pins &= ~self._gpio_out
+			clear_pins &= self._gpio_out
+			if set_pins and clear_pins:
+				self.digital_toggle_bulk(set_pins | clear_pins)
+				return 1
+
+		sent = 0
+		if set_pins:
+			self.digital_write_bulk(set_pins, True)
+			sent += 1
+		if clear_pins:
+			self.digital_write_bulk(clear_pins, False)
+			sent += 1
+		return sent
+
+
+	def _shadow_set(self, pins):
+		if self._gpio_out is not None:
+			self._gpio_out |= pins
+
+
+	def _shadow_clear(self, pins):
+		if self._gpio_out is not None:
+			self._gpio_out &= ~pins & 0xFFFFFFFF
 
 
 
@@ -323,6 +472,21 @@ class Seesaw(object):
 			self.write(SEESAW_TIMER_BASE, SEESAW_TIMER_PWM, cmd)
 
 
+	## \brief     write a value to a DAC channel. Note that the DAC module must be compiled into
+	#				the seesaw firmware for this to function.
+	# 
+	#  \param      channel the DAC channel to write.
+	#	\param		value the value to write. The usable range depends on the resolution of the DAC
+	#				on the seesaw chip, ex. 0 to 1023 for a 10 bit DAC.
+	#
+	#  \return     none
+
+	def dac_write(self, channel, value):
+
+		cmd = bytearray([(value >> 8) & 0xFF, value & 0xFF])
+		self.write(SEESAW_DAC_BASE, SEESAW_DAC_CHANNEL_OFFSET + channel, cmd)
+
+
 	## \brief     Enable the data ready interrupt on the passed sercom. Note that both the interrupt module and
 	#				the passed sercom must be compiled into the seesaw firmware for this to function.
 	#				If both of these things are true, the interrupt pin on the seesaw will fire when
@@ -499,5 +663,16 @@ class Seesaw(object):
 		if not buf == None:
 			c = c + buf
 
+		self.write_raw(c)
+
+
+	## \brief     Write a complete, already built transaction to the seesaw.
+	# 
+	#  \param      buf the module and function address registers followed by the data, ex. a buffer
+	#				prepared ahead of time for a timing sensitive loop.
+	#
+	#  \return     none
+
+	def write_raw(self, buf):
 		self._bus._select_device(self.addr)
-		self._bus._device.write(c)
\ No newline at end of file
+		self._bus._device.write(buf)
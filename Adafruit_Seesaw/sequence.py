@@ -0,0 +1,173 @@
+# Copyright (c) 2017 Adafruit Industries
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import array
+import collections
+
+from .seesaw import SEESAW_GPIO_BASE, SEESAW_GPIO_BULK_SET, SEESAW_GPIO_BULK_CLR, SEESAW_GPIO_BULK_TOGGLE, \
+	_clock, _sleep_until
+
+__all__ = ['GpioSequence', 'SequenceStats']
+
+SequenceStats = collections.namedtuple('SequenceStats', ['steps', 'mean_error', 'max_error', 'errors'])
+
+
+def _frame(regLow, pins):
+	return bytes(bytearray([SEESAW_GPIO_BASE, regLow, (pins >> 24) & 0xFF, (pins >> 16) & 0xFF, (pins >> 8) & 0xFF, pins & 0xFF]))
+
+
+class GpioSequence(object):
+
+	## \brief      Play a timed sequence of GPIO updates.
+	#
+	#				Steps are compiled into ready-to-send I2C transactions up front. Once the level of
+	#				every pin a step touches is known, the step is sent as a single toggle so all of its
+	#				pins change together; before that it needs a set and a clear. The first pass fixes the
+	#				level of every pin, so repeats are always toggles. Playback waits for each step with
+	#				a sleep followed by a short spin on a high resolution clock.
+	#
+	#  \param      seesaw the Seesaw to play the sequence on.
+	#	\param		steps a list of (offset, set_pins, clear_pins). offset is the time in seconds from the
+	#				start of the sequence, set_pins and clear_pins are bitmasks of the pins to drive high and low.
+	#	\param		period the length in seconds of one pass. Required to play more than one pass, and the
+	#				first step of each pass must come after the last step of the pass before it.
+	#	\param		use_shadow pass True to compile the first pass against the seesaw's tracked outputs,
+	#				so it can use toggles too. See Seesaw.digital_write_port() for when they can be trusted.
+
+	def __init__(self, seesaw, steps, period=None, use_shadow=False):
+		self.seesaw = seesaw
+		self.use_shadow = use_shadow
+		self.steps = [(float(offset), set_pins & 0xFFFFFFFF, clear_pins & 0xFFFFFFFF) for offset, set_pins, clear_pins in steps]
+		if not self.steps:
+			raise ValueError("A GPIO sequence needs at least one step.")
+
+		last = None
+		for offset, set_pins, clear_pins in self.steps:
+			if set_pins & clear_pins:
+				raise ValueError("Step at %.6fs both sets and clears pins %#010x." % (offset, set_pins & clear_pins))
+			if last is not None and offset < last:
+				raise ValueError("Step offsets must not go backwards.")
+			last = offset
+
+		self.period = period
+		if period is not None and self.steps[0][0] + period <= last:
+			raise ValueError("The period is too short, the next pass would start before the last step of this one.")
+
+		self.touched = 0
+		self.end_state = 0
+		for offset, set_pins, clear_pins in self.steps:
+			self.touched |= set_pins | clear_pins
+			self.end_state = (self.end_state | set_pins) & ~clear_pins
+
+		# after one pass every touched pin is known, so repeats always compile to toggles
+		self._repeat = self._compile(self.touched, self.end_state)
+		self._first_from = None
+		self._first = None
+
+
+	def _compile(self, known, state):
+		frames = []
+		for offset, set_pins, clear_pins in self.steps:
+			pins = set_pins | clear_pins
+			if pins & ~known == 0:
+				toggle = (set_pins & ~state) | (clear_pins & state)
+				frames.append((_frame(SEESAW_GPIO_BULK_TOGGLE, toggle),) if toggle else ())
+			else:
+				step = []
+				if set_pins:
+					step.append(_frame(SEESAW_GPIO_BULK_SET, set_pins))
+				if clear_pins:
+					step.append(_frame(SEESAW_GPIO_BULK_CLR, clear_pins))
+				frames.append(tuple(step))
+			known |= pins
+			state = (state | set_pins) & ~clear_pins
+		return frames
+
+
+	def _first_pass(self, use_shadow):
+		# compile the first pass against what the seesaw's outputs are believed to be right now
+		shadow = self.seesaw._gpio_out if use_shadow else None
+		start = None if shadow is None else shadow & self.touched
+		if self._first is None or start != self._first_from:
+			if start is None:
+				self._first = self._compile(0, 0)
+			else:
+				self._first = self._compile(self.touched, start)
+			self._first_from = start
+		return self._first
+
+
+	## \brief     Play the sequence.
+	#
+	#				If playback is interrupted the seesaw's output shadow still reflects the last step
+	#				that was sent, or is dropped if a step was only partly sent.
+	#
+	#  \param      loops the number of passes to play.
+	#	\param		spin the time in seconds before each step to stop sleeping and spin instead.
+	#				Larger values trade CPU time for tighter timing.
+	#	\param		use_shadow overrides the use_shadow the sequence was created with, if not None.
+	#
+	#  \return     a SequenceStats. errors holds the lateness in seconds of every step played.
+
+	def play(self, loops=1, spin=.002, use_shadow=None):
+
+		if loops < 1:
+			raise ValueError("A GPIO sequence must be played at least once.")
+		if loops > 1 and self.period is None:
+			raise ValueError("A GPIO sequence needs a period to be played more than once.")
+
+		if use_shadow is None:
+			use_shadow = self.use_shadow
+		passes = [self._first_pass(use_shadow)] + [self._repeat] * (loops - 1)
+		errors = array.array('d')
+
+		bus = self.seesaw._bus
+		bus._select_device(self.seesaw.addr)
+		write = bus._device.write
+
+		# pins driven high and low by the steps sent so far
+		high = 0
+		low = 0
+		writing = False
+		try:
+			# give the first step a moment so it isn't already late
+			start = _clock() + spin
+			for n, frames in enumerate(passes):
+				base = start + n * (self.period or 0.0)
+				for (offset, set_pins, clear_pins), step in zip(self.steps, frames):
+					target = base + offset
+					_sleep_until(target, spin)
+					errors.append(_clock() - target)
+					writing = True
+					for frame in step:
+						write(frame)
+					high = (high | set_pins) & ~clear_pins
+					low = (low | clear_pins) & ~set_pins
+					writing = False
+		finally:
+			if writing:
+				# we can't tell which of the step's pins changed, so stop trusting the shadow
+				self.seesaw._gpio_out = None
+			else:
+				self.seesaw._shadow_set(high)
+				self.seesaw._shadow_clear(low)
+
+		mean = sum(errors) / len(errors) if errors else 0.0
+		return SequenceStats(len(errors), mean, max(errors) if errors else 0.0, errors)
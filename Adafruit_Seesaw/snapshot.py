@@ -0,0 +1,347 @@
+# Copyright (c) 2017 Adafruit Industries
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import collections
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+
+__all__ = ['SnapshotDaemon', 'SnapshotReader', 'Snapshot']
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b'SSNP'
+SNAPSHOT_VERSION = 2
+
+# header: magic, version, number of slots, generation, poll period (seconds)
+_HEADER = struct.Struct('<4sHHId')
+_GENERATION = struct.Struct('<I')
+_GENERATION_OFFSET = 8
+# slot: name, sequence number, value, timestamp
+_SLOT = struct.Struct('<16sIId')
+_SLOT_SEQ = struct.Struct('<I')
+_SLOT_DATA = struct.Struct('<Id')
+_SEQ_OFFSET = 16
+_DATA_OFFSET = 20
+
+Snapshot = collections.namedtuple('Snapshot', ['name', 'seq', 'timestamp', 'value', 'stale'])
+
+
+def _open_region(path, mode, access):
+	# map an existing snapshot region, or return (None, None) if there isn't a valid one
+	try:
+		f = open(path, mode)
+	except (IOError, OSError):
+		return None, None
+	try:
+		m = mmap.mmap(f.fileno(), 0, access=access)
+	except (ValueError, EnvironmentError):
+		f.close()
+		return None, None
+	if len(m) < _HEADER.size or _HEADER.unpack_from(m, 0)[:2] != (SNAPSHOT_MAGIC, SNAPSHOT_VERSION):
+		m.close()
+		f.close()
+		return None, None
+	return f, m
+
+
+class SnapshotDaemon(object):
+
+	## \brief      Poll seesaw registers on behalf of other processes.
+	#
+	#				The daemon owns the passed seesaw devices. It reads each configured
+	#				channel once per period and publishes the latest value into a memory-mapped
+	#				file that any number of SnapshotReader instances can read without touching the bus.
+	#
+	#  \param      path the file backing the shared region (ex. '/dev/shm/seesaw').
+	#	\param		period the poll period in seconds.
+
+	def __init__(self, path, period=.01):
+		self.path = path
+		self.period = period
+		self._channels = []
+		self._map = None
+		self._file = None
+		self._thread = None
+		self._running = False
+
+
+	## \brief     Publish the state of multiple GPIO pins.
+	#
+	#  \param      name the channel name readers will look up. At most 16 characters.
+	#	\param		seesaw the Seesaw to poll.
+	#	\param		pins a bitmask of the pins to read, as passed to Seesaw.digital_read_bulk()
+	#
+	#  \return     none
+
+	def add_gpio(self, name, seesaw, pins):
+
+		self._add(name, lambda: seesaw.digital_read_bulk(pins))
+
+
+	## \brief     Publish the analog value of an ADC-enabled pin.
+	#
+	#  \param      name the channel name readers will look up. At most 16 characters.
+	#	\param		seesaw the Seesaw to poll.
+	#	\param		pin the pin to read, as passed to Seesaw.analog_read()
+	#
+	#  \return     none
+
+	def add_adc(self, name, seesaw, pin):
+
+		self._add(name, lambda: seesaw.analog_read(pin))
+
+
+	def _add(self, name, poll):
+		if self._map is not None:
+			raise RuntimeError("Channels must be added before the snapshot daemon is started.")
+		if len(name) > 16:
+			raise ValueError("Snapshot channel names are limited to 16 characters.")
+		if name in [c[0] for c in self._channels]:
+			raise ValueError("Snapshot channel %s is already defined." % name)
+		self._channels.append((name, poll))
+
+
+	## \brief     Create the shared region and write the channel table.
+	#
+	#				The region is written to a new file that is then renamed over the path, so readers
+	#				of a region left by an earlier daemon keep reading it intact. The old region's
+	#				generation is then bumped, which makes those readers switch to the new one.
+	#				This is called automatically from SnapshotDaemon.start() and SnapshotDaemon.run()
+	#
+	#  \return     none
+
+	def open(self):
+
+		if self._map is not None:
+			return
+
+		old_file, old_map = _open_region(self.path, 'r+b', mmap.ACCESS_WRITE)
+		generation = 1
+		if old_map is not None:
+			generation = (_GENERATION.unpack_from(old_map, _GENERATION_OFFSET)[0] + 1) & 0xFFFFFFFF or 1
+
+		size = _HEADER.size + _SLOT.size * len(self._channels)
+		tmp = '%s.%d.tmp' % (self.path, os.getpid())
+		self._file = open(tmp, 'w+b')
+		self._file.truncate(size)
+		self._map = mmap.mmap(self._file.fileno(), size)
+
+		_HEADER.pack_into(self._map, 0, SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(self._channels), generation, self.period)
+		for i, (name, poll) in enumerate(self._channels):
+			_SLOT.pack_into(self._map, _HEADER.size + i * _SLOT.size, name.encode('ascii'), 0, 0, 0.0)
+		self._map.flush()
+		os.rename(tmp, self.path)
+
+		if old_map is not None:
+			# tell readers still on the old region that it has been replaced
+			_GENERATION.pack_into(old_map, _GENERATION_OFFSET, generation)
+			old_map.close()
+			old_file.close()
+
+
+	## \brief     Poll every channel once and publish the results.
+	#
+	#  \return     none
+
+	def poll(self):
+
+		for i, (name, poll) in enumerate(self._channels):
+			try:
+				value = poll()
+			except (IOError, OSError) as e:
+				logger.warning("Failed to poll snapshot channel %s: %s", name, e)
+				continue
+			self._publish(_HEADER.size + i * _SLOT.size, value, time.time())
+
+
+	def _publish(self, offset, value, timestamp):
+		# seqlock: an odd sequence number tells readers the slot is being written
+		seq = _SLOT_SEQ.unpack_from(self._map, offset + _SEQ_OFFSET)[0]
+		_SLOT_SEQ.pack_into(self._map, offset + _SEQ_OFFSET, (seq + 1) & 0xFFFFFFFF)
+		_SLOT_DATA.pack_into(self._map, offset + _DATA_OFFSET, value & 0xFFFFFFFF, timestamp)
+		_SLOT_SEQ.pack_into(self._map, offset + _SEQ_OFFSET, (seq + 2) & 0xFFFFFFFF)
+
+
+	## \brief     Poll all channels every period until SnapshotDaemon.stop() is called.
+	#
+	#  \return     none
+
+	def run(self):
+
+		self.open()
+		self._running = True
+		self._loop()
+
+
+	def _loop(self):
+		next_poll = time.time()
+		while self._running:
+			self.poll()
+			next_poll += self.period
+			delay = next_poll - time.time()
+			if delay > 0:
+				time.sleep(delay)
+			else:
+				next_poll = time.time()
+
+
+	## \brief     Run the poll loop in a background thread.
+	#
+	#  \return     none
+
+	def start(self):
+
+		self.open()
+		self._running = True
+		self._thread = threading.Thread(target=self._loop)
+		self._thread.daemon = True
+		self._thread.start()
+
+
+	## \brief     Stop the poll loop and release the shared region. The backing file is left in
+	#				place so readers that still have it mapped keep their last values.
+	#
+	#  \return     none
+
+	def stop(self):
+
+		self._running = False
+		if self._thread is not None:
+			self._thread.join()
+			self._thread = None
+		if self._map is not None:
+			self._map.close()
+			self._file.close()
+			self._map = None
+			self._file = None
+
+
+class SnapshotReader(object):
+
+	## \brief      Read values published by a SnapshotDaemon.
+	#
+	#				Reads never touch the I2C bus and never take a lock, so any number of
+	#				processes can read the same channels for the cost of a single poll. If the
+	#				daemon is restarted, the reader follows it to the new region on its next read.
+	#
+	#  \param      path the file backing the shared region, as passed to SnapshotDaemon.
+	#	\param		retries the number of times to retry a slot that is being written before giving up
+	#				on it. A daemon killed in the middle of publishing leaves its slot that way for good.
+
+	def __init__(self, path, retries=1000):
+		self.path = path
+		self.retries = retries
+		self._file = None
+		self._map = None
+		self._attach()
+
+
+	def _attach(self):
+		f, m = _open_region(self.path, 'rb', mmap.ACCESS_READ)
+		if m is None:
+			raise RuntimeError("%s is not a seesaw snapshot region." % self.path)
+		if self._map is not None:
+			self.close()
+		self._file, self._map = f, m
+
+		magic, version, count, self._generation, self.period = _HEADER.unpack_from(self._map, 0)
+		self._last = {}
+		self._offsets = collections.OrderedDict()
+		for i in range(count):
+			offset = _HEADER.size + i * _SLOT.size
+			name = _SLOT.unpack_from(self._map, offset)[0].rstrip(b'\0').decode('ascii')
+			self._offsets[name] = offset
+
+
+	## \brief     The names of the published channels.
+
+	@property
+	def names(self):
+		return list(self._offsets.keys())
+
+
+	## \brief     Read the latest snapshot of a channel.
+	#
+	#  \param      name the channel name.
+	#
+	#  \return     a Snapshot of the channel. A seq of 0 means the channel has not been polled yet.
+	#				If no consistent value could be read within the retries, the last consistent
+	#				Snapshot this reader saw is returned (or the slot as it stands, if there is none)
+	#				with stale set to True.
+
+	def read(self, name):
+
+		self._follow()
+		return self._read(name, self._offsets[name])
+
+
+	def _follow(self):
+		if _GENERATION.unpack_from(self._map, _GENERATION_OFFSET)[0] != self._generation:
+			# the daemon was restarted, its channels may have moved
+			self._attach()
+
+
+	def _read(self, name, offset):
+		for _ in range(self.retries):
+			seq = _SLOT_SEQ.unpack_from(self._map, offset + _SEQ_OFFSET)[0]
+			if seq & 1:
+				continue
+			value, timestamp = _SLOT_DATA.unpack_from(self._map, offset + _DATA_OFFSET)
+			if _SLOT_SEQ.unpack_from(self._map, offset + _SEQ_OFFSET)[0] == seq:
+				snapshot = Snapshot(name, seq >> 1, timestamp, value, False)
+				self._last[name] = snapshot
+				return snapshot
+
+		last = self._last.get(name)
+		if last is None:
+			seq = _SLOT_SEQ.unpack_from(self._map, offset + _SEQ_OFFSET)[0]
+			value, timestamp = _SLOT_DATA.unpack_from(self._map, offset + _DATA_OFFSET)
+			return Snapshot(name, seq >> 1, timestamp, value, True)
+		return last._replace(stale=True)
+
+
+	## \brief     Read the latest snapshot of every channel.
+	#
+	#  \return     a dict mapping channel names to Snapshots.
+
+	def read_all(self):
+
+		self._follow()
+		return collections.OrderedDict((name, self._read(name, offset)) for name, offset in self._offsets.items())
+
+
+	## \brief     Read the latest value of a channel.
+	#
+	#  \param      name the channel name.
+	#
+	#  \return     the value last published for the channel.
+
+	def value(self, name):
+
+		return self.read(name).value
+
+
+	def close(self):
+		self._map.close()
+		self._file.close()